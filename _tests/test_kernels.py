@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import linregress
+from talib import NATR
+
+from cyberoasisprojectreborn._depreciated.backtest.momentum_rank.momentum_allocation import _inv_vol_allocations_nb
+from cyberoasisprojectreborn.utils.utility import _natr_nb, _rolling_beta_nb, _rolling_slope_r2_nb, _slope_r2_nb
+
+
+def _random_ohlc(n_rows: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_rows)))
+    high = close * (1 + rng.uniform(0, 0.03, n_rows))
+    low = close * (1 - rng.uniform(0, 0.03, n_rows))
+    return high, low, close
+
+
+def test_natr_matches_talib():
+    period = 14
+    high, low, close = _random_ohlc(200)
+    # Pair listed late and a single missing candle in the middle
+    for values in (high, low, close):
+        values[:5] = np.nan
+        values[120] = np.nan
+
+    expected = NATR(high, low, close, timeperiod=period)
+    out = np.empty((len(close), 1))
+    _natr_nb(high[:, None], low[:, None], close[:, None], period, out)
+    np.testing.assert_allclose(out[:, 0], expected, rtol=1e-9, equal_nan=True)
+
+    out_32 = np.empty((len(close), 1), dtype=np.float32)
+    _natr_nb(high[:, None].astype(np.float32), low[:, None].astype(np.float32),
+             close[:, None].astype(np.float32), period, out_32)
+    np.testing.assert_allclose(out_32[:, 0], expected, rtol=1e-4, equal_nan=True)
+
+
+def test_rolling_beta_matches_linregress():
+    window = 20
+    rng = np.random.default_rng(1)
+    x = np.cumsum(rng.normal(0, 0.01, 150)) + 10
+    y = 1.3 * x + rng.normal(0, 0.005, 150)
+    y[60] = np.nan
+
+    expected = np.full(len(x), np.nan)
+    for i in range(window - 1, len(x)):
+        x_window, y_window = x[i - window + 1:i + 1], y[i - window + 1:i + 1]
+        if not np.isnan(x_window).any() and not np.isnan(y_window).any():
+            expected[i] = linregress(x_window, y_window).slope
+
+    out = np.empty(len(x))
+    _rolling_beta_nb(x, y, window, out)
+    np.testing.assert_allclose(out, expected, rtol=1e-7, equal_nan=True)
+
+
+def test_rolling_slope_r2_matches_linregress():
+    window = 30
+    _, _, close = _random_ohlc(120, seed=2)
+    log_close = np.log(close)[:, None]
+
+    expected_slope = np.full(len(close), np.nan)
+    expected_r2 = np.full(len(close), np.nan)
+    for i in range(window - 1, len(close)):
+        regression = linregress(np.arange(window), log_close[i - window + 1:i + 1, 0])
+        expected_slope[i] = regression.slope
+        expected_r2[i] = regression.rvalue ** 2
+
+    slope = np.empty_like(log_close)
+    r_squared = np.empty_like(log_close)
+    _rolling_slope_r2_nb(log_close, window, slope, r_squared)
+    np.testing.assert_allclose(slope[:, 0], expected_slope, rtol=1e-7, equal_nan=True)
+    np.testing.assert_allclose(r_squared[:, 0], expected_r2, rtol=1e-7, equal_nan=True)
+
+
+def test_slope_r2_matches_linregress():
+    _, _, close = _random_ohlc(90, seed=4)
+    log_close = np.log(close)
+
+    regression = linregress(np.arange(len(log_close)), log_close)
+    slope, r_squared = _slope_r2_nb(log_close)
+    np.testing.assert_allclose([slope, r_squared], [regression.slope, regression.rvalue ** 2], rtol=1e-9)
+
+
+def test_inv_vol_allocations_match_pandas():
+    rng = np.random.default_rng(3)
+    top_mask = rng.random((6, 5)) < 0.6
+    inv_vol = 1 / rng.uniform(1, 5, (6, 5))
+    # NATR still warming up while momentum is already valid, then a single top pair missing a candle
+    inv_vol[:2] = np.nan
+    inv_vol[4, 1] = np.nan
+    top_mask[4, 1] = True
+
+    masked = pd.DataFrame(inv_vol).where(top_mask)
+    expected = masked.div(masked.sum(axis=1), axis=0).to_numpy()
+    out = np.empty(inv_vol.shape)
+    _inv_vol_allocations_nb(top_mask, inv_vol, out)
+    np.testing.assert_allclose(out, expected, rtol=1e-12, equal_nan=True)
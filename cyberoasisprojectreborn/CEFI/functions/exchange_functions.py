@@ -8,7 +8,7 @@ from typing import TYPE_CHECKING
 import pandas as pd
 from pandas import DataFrame as df
 
-from cyberoasisprojectreborn.CEFI.functions.get_history import GetFullHistory
+from cyberoasisprojectreborn.CEFI.functions.get_history import GetFullHistory, WORKERS
 from cyberoasisprojectreborn.utils.logger_custom import default_logger as logger
 
 if TYPE_CHECKING:
@@ -34,8 +34,8 @@ class ExchangeFunctions:
     def get_pairs_with_precisions_status(self) -> pd.DataFrame:
         """Get exchange pairs with trading precisions and active status"""
         logger.info("Getting pairs with precisions and status...")
-        pairs_precisions_status_df = self.exchange_client.fetch_markets()
-        pairs_precisions_status_df = df(pairs_precisions_status_df,
+        markets = self.exchange_client.load_markets()
+        pairs_precisions_status_df = df(list(markets.values()),
                                         columns=["symbol", "base", "quote", "active", "precision", "limits"])
         pairs_precisions_status_df = pairs_precisions_status_df.astype({"active": str})
         pairs_precisions_status_df.set_index("symbol", inplace=True)
@@ -91,11 +91,9 @@ class ExchangeFunctions:
         """Base functions for retrieving pairs"""
         pairs_precisions_status = self.get_pairs_with_precisions_status()
         pairs_precisions_status = pairs_precisions_status[pairs_precisions_status["active"] == "True"]
-        pairs_list_original = list(pairs_precisions_status.index)
-        pairs_list_original = self._remove_shit_from_pairs_list(pairs_list_original)
-        pairs_list = [str(pair) for pair in pairs_list_original if str(pair).endswith(desired_quote)]
-        pairs_list_final = []
-        [pairs_list_final.append(pair) for pair in pairs_list if pair not in pairs_list_final]
+        pairs_list_original = self._remove_shit_from_pairs_list(list(pairs_precisions_status.index))
+        pairs_index = pd.Index(pairs_list_original, dtype=str)
+        pairs_list_final = list(pairs_index[pairs_index.str.endswith(desired_quote)].unique())
         return pairs_list_final
 
     @staticmethod
@@ -108,10 +106,10 @@ class ExchangeFunctions:
         forbidden_symbols = forbidden_symbols_lying + forbidden_symbols_fiat + forbidden_symbols_stables
         forbidden_symbol_ending = ("UP", "DOWN", "BEAR", "BULL")
 
-        def get_symbol(pair): return str(pair).split("/")[0]
-
-        pairs_list = [str(pair) for pair in pairs_list if not get_symbol(pair) in forbidden_symbols]
-        pairs_list = [str(pair) for pair in pairs_list if not get_symbol(pair).endswith(forbidden_symbol_ending)]
+        pairs_index = pd.Index(pairs_list, dtype=str)
+        symbols = pairs_index.str.split("/").str[0]
+        allowed = ~symbols.isin(forbidden_symbols) & ~symbols.str.endswith(forbidden_symbol_ending)
+        pairs_list = list(pairs_index[allowed])
         return pairs_list
 
     # ############# Leverage ############# #
@@ -168,7 +166,8 @@ class ExchangeFunctions:
                     save_load_history: bool = False,
                     number_of_last_candles: tp.Optional[int] = None,
                     start: tp.Optional[str] = None,
-                    end: tp.Optional[str] = None):
+                    end: tp.Optional[str] = None,
+                    workers: int = WORKERS):
 
         return GetFullHistory(self.exchange, pairs_list, timeframe, min_data_length, vol_quantile_drop,
-                              save_load_history, number_of_last_candles, start, end).get_full_history()
+                              save_load_history, number_of_last_candles, start, end, workers).get_full_history()
@@ -7,12 +7,14 @@ import time
 import traceback
 import typing as tp
 import warnings
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import partial
 from typing import TYPE_CHECKING
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import vectorbtpro as vbt
 
 from cyberoasisprojectreborn.utils.dir_paths import PROJECT_DIR
@@ -34,7 +36,7 @@ class GetFullHistory:
     def __init__(self, exchange: Exchange, pairs_list: list[str], timeframe: str, min_data_length: int = 10,
                  vol_quantile_drop: float = None, save_load_history: bool = False,
                  number_of_last_candles: tp.Optional[int] = None, start: tp.Optional[str] = None,
-                 end: tp.Optional[str] = None):
+                 end: tp.Optional[str] = None, workers: int = WORKERS):
         self.exchange = exchange
         self.exchange_client = exchange.exchange_client
         self.exchange_name = exchange.exchange_name
@@ -47,6 +49,7 @@ class GetFullHistory:
         self.number_of_last_candles = number_of_last_candles
         self.start = start
         self.end = end
+        self.workers = workers
         self._validate_dates()
 
     def get_full_history(self) -> dict[str: pd.DataFrame]:
@@ -58,14 +61,24 @@ class GetFullHistory:
                                           start=self.start, end=self.end, API=self.exchange_client,
                                           save_load_history=self.save_load_history)
 
-            with ThreadPoolExecutor(max_workers=WORKERS) as executor:
-                histories_dict = dict(zip(self.pairs_list, executor.map(vbt_history_partial, self.pairs_list)))
-
-            histories_dict = {pair: history_df for pair, history_df in histories_dict.items() if
-                              dataframe_is_not_none_and_not_empty(history_df)}
+            fetched_dict = {}
+            drop_len_pairs = []
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(self.pairs_list)))) as executor:
+                futures = {executor.submit(vbt_history_partial, pair): pair for pair in self.pairs_list}
+                for future in as_completed(futures):
+                    pair = futures[future]
+                    history_df = future.result()
+                    if not dataframe_is_not_none_and_not_empty(history_df):
+                        continue
+                    if self.min_data_length and len(history_df) <= self.min_data_length:
+                        drop_len_pairs.append(pair)
+                        continue
+                    fetched_dict[pair] = history_df
 
             if self.min_data_length:
-                histories_dict = self._drop_too_short_history(histories_dict=histories_dict)
+                logger.success(f"Pairs dropped due to length: {drop_len_pairs}")
+
+            histories_dict = {pair: fetched_dict[pair] for pair in self.pairs_list if pair in fetched_dict}
 
             if self.vol_quantile_drop:
                 histories_dict = self._drop_bottom_quantile_vol(histories_dict=histories_dict)
@@ -89,7 +102,9 @@ class GetFullHistory:
 
         if dataframe_is_not_none_and_not_empty(one_pair_df):
             one_pair_df = cut_exact_df_dates(one_pair_df, start, end)
-            one_pair_df = one_pair_df.resample(timeframe.lower()).bfill()
+            # Fresh fetch is already resampled to the timeframe, only stored BASE_TIMEFRAME data needs it
+            if save_load_history:
+                one_pair_df = one_pair_df.resample(timeframe.lower()).bfill()
 
         return one_pair_df
 
@@ -97,7 +112,7 @@ class GetFullHistory:
         """Check if loaded data range is sufficient for current request, if not, get new or update existing"""
         timeframe = BASE_TIMEFRAME
         data_storing = _DataStoring(pair=pair, timeframe=timeframe, exchange=self.exchange)
-        one_pair_dict = data_storing.load_pickle()
+        one_pair_dict = data_storing.load_history()
         one_pair_df = one_pair_dict.get("data")
         first_valid_datetime = one_pair_dict.get("first_datetime")
 
@@ -106,7 +121,7 @@ class GetFullHistory:
             first_valid_datetime = vbt.CCXTData.find_earliest_date(symbol=pair, timeframe=timeframe,
                                                                    exchange=self.exchange_client)
             one_pair_dict["first_datetime"] = first_valid_datetime
-            data_storing.save_pickle(one_pair_dict)
+            data_storing.save_history(one_pair_dict)
 
         # Check if coin even exists in this data range
         if first_valid_datetime > end:
@@ -114,38 +129,40 @@ class GetFullHistory:
             return None
 
         if dataframe_is_not_none_and_not_empty(one_pair_df):
+            available_start = one_pair_df.index[0]
+            available_end = one_pair_df.index[-1]
+
             # Check if desired range in the data
-            if (one_pair_df.iloc[0].name <= start) and (one_pair_df.iloc[-1].name >= end):
+            if (available_start <= start) and (available_end >= end):
                 logger.info(f"Saved data for {pair} is sufficient")
 
             # Check if the coin first available datetime was later than the desired start but still before end
-            elif (one_pair_df.iloc[-1].name >= end) and (one_pair_df.iloc[0].name <= first_valid_datetime) and (
+            elif (available_end >= end) and (available_start <= first_valid_datetime) and (
                     first_valid_datetime > start):
                 logger.info(f"Saved data for {pair} is sufficient (history starts later than expected)")
 
             # There is history but not enough, update existing accordingly
             else:
                 logger.info(f"Saved data for {pair} found, not enough, updating accordingly")
-                available_start = one_pair_df.iloc[0].name
-                available_end = one_pair_df.iloc[-1].name
+                history_parts = [one_pair_df]
                 if available_start > start:
                     new_start = start
                     new_end = available_start
                     before_df = self._history_fetch(pair=pair, timeframe=timeframe, start=new_start, end=new_end,
                                                     API=API)
-                    one_pair_df = pd.concat([before_df, one_pair_df]).loc[
-                        ~pd.concat([before_df, one_pair_df]).index.duplicated(keep="last")]
+                    history_parts.insert(0, before_df)
 
                 if available_end < end:
                     new_start = available_end
                     new_end = end
                     after_df = self._history_fetch(pair=pair, timeframe=timeframe, start=new_start, end=new_end,
                                                    API=API)
-                    one_pair_df = pd.concat([one_pair_df, after_df]).loc[
-                        ~pd.concat([one_pair_df, after_df]).index.duplicated(keep="last")]
+                    history_parts.append(after_df)
 
+                one_pair_df = pd.concat(history_parts)
+                one_pair_df = one_pair_df.loc[~one_pair_df.index.duplicated(keep="last")]
                 one_pair_dict["data"] = one_pair_df
-                data_storing.save_pickle(one_pair_dict)
+                data_storing.save_history(one_pair_dict)
 
             return one_pair_df
 
@@ -154,7 +171,7 @@ class GetFullHistory:
             logger.info(f"No saved history for {pair}, getting fresh")
             one_pair_df = self._history_fetch(pair=pair, timeframe=timeframe, start=start, end=end, API=API)
             one_pair_dict["data"] = one_pair_df
-            data_storing.save_pickle(one_pair_dict)
+            data_storing.save_history(one_pair_dict)
 
             return one_pair_df
 
@@ -183,19 +200,12 @@ class GetFullHistory:
             else:
                 raise err
 
-    def _drop_too_short_history(self, histories_dict: dict[str: pd.DataFrame]) -> dict[str: pd.DataFrame]:
-        drop_len_pairs = [pair for pair, history_df in histories_dict.items() if
-                          len(history_df) <= self.min_data_length]
-        for pair in drop_len_pairs:
-            del histories_dict[pair]
-        logger.success(f"Pairs dropped due to length: {drop_len_pairs}")
-
-        return histories_dict
-
     def _drop_bottom_quantile_vol(self, histories_dict: dict[str: pd.DataFrame]) -> dict[str: pd.DataFrame]:
-        mean_volumes = {pair: history_df["Volume"].mean() for pair, history_df in histories_dict.items()}
-        threshold = np.quantile(list(mean_volumes.values()), self.vol_quantile_drop)
-        drop_vol_pairs = [pair for pair, history_df in histories_dict.items() if mean_volumes[pair] < threshold]
+        pairs = list(histories_dict.keys())
+        mean_volumes = np.fromiter((np.nanmean(history_df["Volume"].to_numpy(dtype=np.float64)) for history_df in
+                                    histories_dict.values()), dtype=np.float64, count=len(pairs))
+        threshold = np.quantile(mean_volumes, self.vol_quantile_drop)
+        drop_vol_pairs = [pairs[i] for i in np.flatnonzero(mean_volumes < threshold)]
         for pair in drop_vol_pairs:
             del histories_dict[pair]
         logger.success(f"Pairs dropped due to being in bottom {self.vol_quantile_drop * 100}% volume: {drop_vol_pairs}")
@@ -222,7 +232,7 @@ class GetFullHistory:
 
 
 class _DataStoring:
-    """Class for handling the history loading and saving to pickle"""
+    """Class for handling the history loading and saving to parquet"""
 
     def __init__(self, pair: str, timeframe: str, exchange: Exchange):
         self.exchange_path_name = exchange.exchange_path_name
@@ -231,8 +241,13 @@ class _DataStoring:
         self.timeframe = timeframe
 
     @property
-    def _pair_pickle_location(self) -> str:
+    def _pair_parquet_location(self) -> str:
         """Return the path where this pair should be saved"""
+        return f"{self._history_data_folder_location}\\{self.pair_for_data}_{self.timeframe}.parquet"
+
+    @property
+    def _pair_pickle_location(self) -> str:
+        """Return the path where this pair was saved before moving to parquet"""
         return f"{self._history_data_folder_location}\\{self.pair_for_data}_{self.timeframe}.pickle"
 
     @property
@@ -241,14 +256,20 @@ class _DataStoring:
         return os.path.join(PROJECT_DIR, "CyberOasisProjectReborn", "CEFI", "history_data", self.exchange_path_name,
                             self.timeframe)
 
-    def load_pickle(self) -> dict:
-        """Check for pickled data and load, if no folder for data - create"""
+    def load_history(self) -> dict:
+        """Check for saved data and load, if no folder for data - create"""
 
         if not os.path.exists(self._history_data_folder_location):
             try:
                 os.makedirs(self._history_data_folder_location)
             except Exception as err:
                 pass
+        elif os.path.exists(self._pair_parquet_location):
+            one_pair_table = pq.read_table(self._pair_parquet_location)
+            first_datetime = (one_pair_table.schema.metadata or {}).get(b"first_datetime")
+            one_pair_df = one_pair_table.to_pandas()
+            return {"data": one_pair_df if not one_pair_df.empty else None,
+                    "first_datetime": pd.Timestamp(first_datetime.decode()) if first_datetime else None}
         else:
             try:
                 with open(self._pair_pickle_location, "rb") as f:
@@ -263,8 +284,14 @@ class _DataStoring:
 
         return {}
 
-    def save_pickle(self, dict_to_save: dict[dt.datetime: pd.DataFrame]) -> None:
-        """Pickle the data and save"""
-        with open(self._pair_pickle_location, "wb") as f:
-            pickle.dump(dict_to_save, f)
-        logger.info(f"Saved {self.pair} history dict as pickle")
+    def save_history(self, dict_to_save: dict[dt.datetime: pd.DataFrame]) -> None:
+        """Save the data as zstd compressed parquet, first valid datetime is kept in the schema metadata"""
+        one_pair_df = dict_to_save.get("data")
+        one_pair_table = pa.Table.from_pandas(one_pair_df if one_pair_df is not None else pd.DataFrame())
+        first_datetime = dict_to_save.get("first_datetime")
+        if first_datetime is not None:
+            one_pair_table = one_pair_table.replace_schema_metadata(
+                {**(one_pair_table.schema.metadata or {}),
+                 b"first_datetime": pd.Timestamp(first_datetime).isoformat().encode()})
+        pq.write_table(one_pair_table, self._pair_parquet_location, compression="zstd")
+        logger.info(f"Saved {self.pair} history as parquet")
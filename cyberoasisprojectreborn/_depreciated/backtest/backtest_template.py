@@ -14,26 +14,32 @@ class BacktestTemplate(ABC):
         self.vbt_data = None
 
     def _run(self):
-        backtest_pickle_name = os.path.join(get_calling_module_location(), "backtest.pickle")
-        if os.path.exists(backtest_pickle_name):
+        module_location = get_calling_module_location()
+        backtest_pickle_name = os.path.join(module_location, "backtest.pickle")
+        trades_excel_name = os.path.join(module_location, "trades_analytics.xlsx")
+        analytics_excel_name = os.path.join(module_location, "backtest_analytics.xlsx")
+        fresh_backtest = not os.path.exists(backtest_pickle_name)
+        if not fresh_backtest:
             pf = vbt.Portfolio.load(backtest_pickle_name)
         else:
             self.vbt_data = self._get_history()
             pf = self.current_strat(vbt_data=self.vbt_data, periods=self.PERIODS)
             pf.save(backtest_pickle_name)
         analytics = pf.stats(agg_func=None)
-        trades = pf.get_trade_history()
         print(analytics.to_string())
 
+        # Saved backtest already has its excels written, skip the slow serialization unless they are missing
+        if not fresh_backtest and os.path.exists(trades_excel_name) and os.path.exists(analytics_excel_name):
+            return
+
+        trades = pf.get_trade_history()
         try:
             trades[["Index"]] = trades[["Index"]]
             analytics[["Start", "End"]] = analytics[["Start", "End"]]
             if isinstance(trades, pd.DataFrame):
-                excel_save_formatted_naive(dataframe=trades, filename=os.path.join(get_calling_module_location(),
-                                                                                   "trades_analytics.xlsx"))
+                excel_save_formatted_naive(dataframe=trades, filename=trades_excel_name)
             if isinstance(analytics, pd.DataFrame):
-                excel_save_formatted_naive(dataframe=analytics, filename=os.path.join(get_calling_module_location(),
-                                                                                      "backtest_analytics.xlsx"))
+                excel_save_formatted_naive(dataframe=analytics, filename=analytics_excel_name)
         except Exception as err:
             print(err)
 
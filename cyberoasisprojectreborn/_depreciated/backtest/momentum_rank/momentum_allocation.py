@@ -3,9 +3,11 @@ from functools import partial
 import numpy as np
 import pandas as pd
 import vectorbtpro as vbt
+from numba import njit
+
 from cyberoasisprojectreborn.utils.logger_custom import default_logger as logger
 
-from cyberoasisprojectreborn.utils.utility import resample_datetime_index
+from cyberoasisprojectreborn.utils.utility import resample_datetime_index, _rolling_log_slope_r2, _natr_nb
 
 
 class MomentumStrat:
@@ -68,17 +70,20 @@ class MomentumAllocation:
                                                  only_positive=only_positive, backtest_trim=backtest_trim,
                                                  top_number=top_number)
 
+        top_mask = top_momentum_pairs.to_numpy()
         if NATR_period:
-            natr_data = vbt_data.run("talib_NATR", timeperiod=NATR_period).real
-            natr_data.columns = natr_data.columns.droplevel(0)
-            inv_vol_data = 1 / natr_data
-
-            top_pairs_inv_vol = inv_vol_data.where(top_momentum_pairs, other=np.nan)
-            sum_top_pairs_inv_vol = top_pairs_inv_vol.sum(axis=1)
-            allocations = top_pairs_inv_vol.div(sum_top_pairs_inv_vol, axis=0)
+            high, low, close = (vbt_data.get(column).reindex(columns=top_momentum_pairs.columns).to_numpy(
+                dtype=np.float32) for column in ("High", "Low", "Close"))
+            natr = np.empty(top_mask.shape, dtype=np.float32)
+            _natr_nb(high, low, close, NATR_period, natr)
+            inv_vol = 1 / natr
         else:
-            sum_top_pairs = top_momentum_pairs.sum(axis=1)
-            allocations = top_momentum_pairs.div(sum_top_pairs, axis=0)
+            inv_vol = np.ones(top_mask.shape, dtype=np.float32)
+
+        allocations = np.empty(top_mask.shape, dtype=np.float32)
+        _inv_vol_allocations_nb(top_mask, inv_vol, allocations)
+        allocations = pd.DataFrame(allocations, index=top_momentum_pairs.index,
+                                   columns=top_momentum_pairs.columns)
 
         if btc_sma_p:
             btc_close_data = vbt_data.get(symbols="BTC/USDT", columns="Close")
@@ -92,29 +97,54 @@ class MomentumAllocation:
     def _momentum_rank(self, vbt_data: vbt.Data, momentum_period: int, only_positive: bool, backtest_trim: bool,
                        top_number: int):
         momentum_data = self._momentum_calc_for_vbt_data(vbt_data=vbt_data, momentum_period=momentum_period)
-        momentum_data.columns = momentum_data.columns.droplevel(0)
 
         if only_positive:
             momentum_data = momentum_data.where(momentum_data > 0, other=np.nan)
 
         if backtest_trim:
             avg_momentums = momentum_data.mean()
-            lower_cutoff = avg_momentums.quantile(0.05)
-            upper_cutoff = avg_momentums.quantile(0.95)
+            lower_cutoff, upper_cutoff = np.nanquantile(avg_momentums.to_numpy(), [0.05, 0.95])
             momentum_data.loc[:, (avg_momentums < lower_cutoff) | (avg_momentums > upper_cutoff)] = 0
 
-        ranked_df = momentum_data.rank(axis=1, method="max", ascending=False)
-        top_momentum_pairs = ranked_df <= top_number
+        momentum = momentum_data.to_numpy(dtype=np.float64)
+        valid_momentum = ~np.isnan(momentum)
+        if top_number <= 0:
+            top_mask = np.zeros_like(valid_momentum)
+        elif top_number >= momentum.shape[1]:
+            top_mask = valid_momentum
+        else:
+            # Same rule as rank(method="max") <= top_number, pairs tied at the cutoff are all dropped on overflow
+            cutoff = -np.partition(np.where(valid_momentum, -momentum, np.inf), top_number - 1,
+                                   axis=1)[:, top_number - 1:top_number]
+            above_cutoff = valid_momentum & (momentum > cutoff)
+            at_cutoff = valid_momentum & (momentum == cutoff)
+            ties_fit = (above_cutoff.sum(axis=1) + at_cutoff.sum(axis=1) <= top_number)[:, None]
+            top_mask = above_cutoff | (at_cutoff & ties_fit)
+        top_momentum_pairs = pd.DataFrame(top_mask, index=momentum_data.index, columns=momentum_data.columns)
 
         return top_momentum_pairs
 
     @staticmethod
     def _momentum_calc_for_vbt_data(vbt_data: vbt.Data, momentum_period: int) -> dict[str: pd.DataFrame]:
         """Calculate momentum for vbt data"""
-        returns = np.log(vbt_data.get("Close"))
-        x = np.arange(len(returns))
-        slope = vbt.OLS.run(x=x, y=returns, window=momentum_period).slope * 100
-        correlation_func = vbt.IF.from_expr("@out_corr:rolling_corr_nb(@in_x, @in_y, @p_window)")
-        rvalue = correlation_func.run(x, returns, momentum_period).corr
-
-        return round(slope * (rvalue ** 2), 4)
+        close = vbt_data.get("Close")
+        slope, r_squared = _rolling_log_slope_r2(close=close, window=momentum_period)
+
+        return close.vbt.wrapper.wrap(np.round(slope * 100 * r_squared, 4))
+
+
+@njit(cache=True)
+def _inv_vol_allocations_nb(top_mask: np.ndarray, inv_vol: np.ndarray, out: np.ndarray) -> None:
+    """Mask, row sum and normalization of inverse volatility in one pass, NaN outside of the top pairs and on rows
+    where none of the top pairs has a volatility yet"""
+    n_rows, n_cols = top_mask.shape
+    for i in range(n_rows):
+        total = 0.0
+        for col in range(n_cols):
+            if top_mask[i, col] and not np.isnan(inv_vol[i, col]):
+                total += inv_vol[i, col]
+        for col in range(n_cols):
+            if top_mask[i, col] and total != 0.0:
+                out[i, col] = inv_vol[i, col] / total
+            else:
+                out[i, col] = np.nan
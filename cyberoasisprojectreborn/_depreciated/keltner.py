@@ -9,8 +9,10 @@ class KeltnerStrat:
                                                                 scalar=self.DEVIATION)
         upper_band = keltner.kcue.to_numpy()
         lower_band = keltner.kcle.to_numpy()
-        trend = np.where(price_df.close < lower_band, 1, 0)
-        trend = np.where(price_df.close > upper_band, -1, trend)
+        close = price_df["close"].to_numpy()
+        trend = np.zeros(close.shape, dtype=np.int8)
+        trend[close < lower_band] = 1
+        trend[close > upper_band] = -1
 
         entries = trend == 1
         exits = trend == -1
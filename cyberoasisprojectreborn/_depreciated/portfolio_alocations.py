@@ -1,36 +1,49 @@
+from functools import reduce
+
 import numpy as np
 import pandas as pd
 from loguru import logger
-from scipy.stats import linregress
 from talib import NATR
 
 from cyberoasisprojectreborn.CEFI.exchange import GetFullHistoryDF
+from cyberoasisprojectreborn.utils.utility import _rolling_beta_nb
 
 
 def calc_portfolio_parity(pairs_history_df_dict: dict[str: pd.DataFrame], NATR_period: int, investment: int = 1000,
                           winsor_trim: bool = False) -> dict[str: pd.DataFrame]:
     """Calculate parity allocation for list of history dataframes"""
     logger.info("Calculating portfolio parity for pairs histories")
+    if not pairs_history_df_dict:
+        return {}
 
     TRIM = 0.1
-    total_inv_vola = 0
-    for pair, pair_df in pairs_history_df_dict.items():
-        pair_df["natr"] = NATR(close=pair_df["close"], high=pair_df["high"], low=pair_df["low"], timeperiod=NATR_period)
-        inv_vola = 1 / pair_df["natr"]
-        pair_df["inv_vola"] = inv_vola
-        total_inv_vola += inv_vola
+    natr_dict = {pair: NATR(close=pair_df["close"].to_numpy(dtype=np.float64),
+                            high=pair_df["high"].to_numpy(dtype=np.float64),
+                            low=pair_df["low"].to_numpy(dtype=np.float64),
+                            timeperiod=NATR_period)
+                 for pair, pair_df in pairs_history_df_dict.items()}
+    master_index = reduce(lambda index, other: index.union(other),
+                          (pair_df.index for pair_df in pairs_history_df_dict.values()))
+    natr_matrix = np.full((len(master_index), len(natr_dict)), np.nan, dtype=np.float64)
+    for col, (pair_df, natr) in enumerate(zip(pairs_history_df_dict.values(), natr_dict.values())):
+        if pair_df.index.equals(master_index):
+            natr_matrix[:, col] = natr
+        else:
+            natr_matrix[master_index.get_indexer(pair_df.index), col] = natr
+    inv_vola = 1 / natr_matrix
+    total_inv_vola = inv_vola.sum(axis=1, keepdims=True)
+    weights_df = pd.DataFrame(np.round(inv_vola / total_inv_vola, 4), index=master_index, columns=list(natr_dict))
 
     for pair, pair_df in pairs_history_df_dict.items():
-        pair_df["weight"] = round(pair_df["inv_vola"] / total_inv_vola, 4)
-        pair_df["weight_ccy"] = round(pair_df["weight"] * investment, 0)
-        pair_df.drop(columns=["natr", "inv_vola"])
+        weight = weights_df[pair].reindex(pair_df.index).to_numpy()
+        pair_df[["weight", "weight_ccy"]] = np.column_stack([weight, np.round(weight * investment, 0)])
 
     if winsor_trim:
-        natr_values = [history_df["natr"].iloc[-1] for history_df in pairs_history_df_dict.values()]
-        lower = pd.Series(natr_values).quantile(TRIM)
-        upper = pd.Series(natr_values).quantile(1 - TRIM)
+        natr_last = {pair: natr[-1] for pair, natr in natr_dict.items()}
+        lower, upper = np.nanquantile(np.fromiter(natr_last.values(), dtype=np.float64, count=len(natr_last)),
+                                      [TRIM, 1 - TRIM])
         pairs_history_df_dict = {pair: history_df for pair, history_df in pairs_history_df_dict.items() if
-                                 (history_df["natr"].iloc[-1] > lower) or (history_df["natr"].iloc[-1] < upper)}
+                                 lower < natr_last[pair] < upper}
 
     pairs_history_df_dict_portfolio_parity = pairs_history_df_dict
 
@@ -56,16 +69,17 @@ def calc_beta_neutral_allocation_for_two_pairs(pair_long: str, pair_short: str,
 
     total_beta = 0
     for pair_df in pairs_history_df_dict.values():
-        asset_rolling_returns = pair_df["returns"].rolling(beta_period)
-        beta = asset_rolling_returns.apply(
-            lambda x: linregress(x, benchmark_history_df.loc[x.index][-beta_period:]["returns"])[0])
+        benchmark_returns = benchmark_history_df["returns"].reindex(pair_df.index).to_numpy(dtype=np.float64)
+        beta = np.empty(len(pair_df), dtype=np.float64)
+        _rolling_beta_nb(pair_df["returns"].to_numpy(dtype=np.float64), benchmark_returns, beta_period, beta)
+        beta = pd.Series(beta, index=pair_df.index)
         pair_df["beta"] = beta
         total_beta += beta
 
     for pair_df in pairs_history_df_dict.values():
-        pair_df["allocation"] = round((total_beta - pair_df["beta"]) / total_beta, 4)
-        pair_df["allocation_ccy"] = round((total_beta - pair_df["beta"]) / total_beta * investment, 0)
-        pair_df.drop(columns=["returns"])
+        allocation = ((total_beta - pair_df["beta"]) / total_beta).reindex(pair_df.index).to_numpy()
+        pair_df[["allocation", "allocation_ccy"]] = np.column_stack([np.round(allocation, 4),
+                                                                     np.round(allocation * investment, 0)])
 
     pairs_history_df_dict_beta_neutral = pairs_history_df_dict
 
@@ -1,4 +1,4 @@
-import pandas as pd
+import numpy as np
 from pandas import DataFrame as df
 
 from cyberoasisprojectreborn.CEFI.functions.fundamental_template import FundamentalTemplate
@@ -17,6 +17,7 @@ class _BaseTemplate(FundamentalTemplate):
         self.TIMEFRAME = "1h"
         self.VOL_QUANTILE_DROP = 0.3
         self.DAYS_WINDOWS = [1, 2, 3, 7, 14, 31]
+        self.WORKERS = 4
 
     @property
     def number_of_last_candles(self):
@@ -35,27 +36,23 @@ class PerformanceRankAnalysis(_BaseTemplate):
         vbt_data = self.exchange.functions.get_history(pairs_list=self.pairs_list, timeframe=self.TIMEFRAME,
                                                        number_of_last_candles=self.number_of_last_candles,
                                                        min_data_length=self.min_data_length,
-                                                       vol_quantile_drop=self.VOL_QUANTILE_DROP)
-        hist_dict = {f"hist_{days}d": vbt_data.iloc[days * (-24):] for days in self.DAYS_WINDOWS}
+                                                       vol_quantile_drop=self.VOL_QUANTILE_DROP,
+                                                       workers=self.WORKERS)
+        close_df = vbt_data.get(columns="Close")
+        closes = close_df.to_numpy(dtype=np.float32)
+        volumes = vbt_data.get(columns="Volume").reindex(columns=close_df.columns).to_numpy(dtype=np.float32)
 
-        hist_24h = hist_dict["hist_1d"]
-        hist_prev_24h = vbt_data.iloc[-48:-24]
-        hist_3d = hist_dict["hist_3d"]
-        hist_7d = hist_dict["hist_7d"]
+        hist_24h_median_vol = np.nanmedian(volumes[-24:], axis=0)
+        hist_3d_median_vol = np.nanmedian(volumes[-3 * 24:], axis=0)
+        hist_7d_median_vol = np.nanmedian(volumes[-7 * 24:], axis=0)
 
-        hist_24h_median_vol = hist_24h.get(columns="Volume").median()
-        hist_3d_median_vol = hist_3d.get(columns="Volume").median()
-        hist_7d_median_vol = hist_7d.get(columns="Volume").median()
+        price_24h_change, price_prev_24h_change = self._calculate_price_changes(closes, start_rows=[-24, -48],
+                                                                                end_rows=[-1, -25])
+        vol_3d_incr = np.round(hist_3d_median_vol / hist_24h_median_vol, 2)
+        vol_7d_incr = np.round(hist_7d_median_vol / hist_24h_median_vol, 2)
 
-        price_24h_change = self._calculate_price_change(hist_24h.get(columns="Close"))
-        price_prev_24h_change = self._calculate_price_change(hist_prev_24h.get(columns="Close"))
-        vol_3d_incr = round((hist_3d_median_vol / hist_24h_median_vol), 2).to_dict()
-        vol_7d_incr = round((hist_7d_median_vol / hist_24h_median_vol), 2).to_dict()
-
-        full_performance_df = df.from_dict(
-            {pair: {"24h_change": price_24h_change[pair], "prev_24h_change": price_prev_24h_change[pair],
-                    "3d_vol_incr": vol_3d_incr[pair], "7d_vol_incr": vol_7d_incr[pair]
-                    } for pair, _ in vol_3d_incr.items()}, orient="index")
+        full_performance_df = df({"24h_change": price_24h_change, "prev_24h_change": price_prev_24h_change,
+                                  "3d_vol_incr": vol_3d_incr, "7d_vol_incr": vol_7d_incr}, index=close_df.columns)
 
         excel_save_formatted_naive(full_performance_df, filename="performance.xlsx", global_cols_size=15)
         logger.success("Saved excel")
@@ -84,9 +81,10 @@ class PerformanceRankAnalysis(_BaseTemplate):
             pass
 
     @staticmethod
-    def _calculate_price_change(hist_df: pd.DataFrame) -> float:
-        """Function counting price change in %"""
-        performance = (hist_df.iloc[-1] - hist_df.iloc[0]) / hist_df.iloc[0]
+    def _calculate_price_changes(closes: np.ndarray, start_rows: list[int], end_rows: list[int]) -> np.ndarray:
+        """Function counting price change in % for every pair column, one row per (start, end) window"""
+        start_closes = closes[start_rows]
+        performance = (closes[end_rows] - start_closes) / start_closes
         return performance
 
 
@@ -3,15 +3,16 @@ import inspect
 import math
 import os
 import time
+import typing as tp
 from datetime import timedelta
 
 import numpy as np
 import pandas as pd
 import vectorbtpro as vbt
 from loguru import logger
+from numba import njit, prange
 from pandas import DataFrame as df
 from pandas import ExcelWriter
-from scipy.stats import linregress
 from vectorbtpro.utils.datetime_ import get_local_tz
 
 
@@ -43,7 +44,7 @@ def timestamp_ms_to_datetime(timestamp_ms: int) -> dt.datetime:
 def cut_exact_df_dates(pre_dataframe: pd.DataFrame, start: dt.datetime, end: dt.datetime) -> pd.DataFrame:
     """Cut the dataframe to exactly match the desired since/end, small quirk here as end_datetime can be precise to
      the second while the TIMEFRAME may be 1D - it would never return correctly, mainly when the end is now"""
-    cut_dataframe = pre_dataframe.loc[start:min(pre_dataframe.iloc[-1].name, end)]
+    cut_dataframe = pre_dataframe.loc[start:min(pre_dataframe.index[-1], end)]
 
     return cut_dataframe
 
@@ -121,14 +122,18 @@ def resample_datetime_index(dt_index: pd.DataFrame.index, resample_tf: str):
 
 
 def merge_df_dicts(*dicts):
-    merged_dict = {}
+    frames_dict = {}
     for dict_item in dicts:
         for key, value in dict_item.items():
-            if key in merged_dict:
-                merged_dict[key] = pd.concat([merged_dict[key], value]).loc[
-                    ~pd.concat([merged_dict[key], value]).index.duplicated(keep="last")]
-            else:
-                merged_dict.update({key: value})
+            frames_dict.setdefault(key, []).append(value)
+
+    merged_dict = {}
+    for key, frames in frames_dict.items():
+        if len(frames) == 1:
+            merged_dict[key] = frames[0]
+        else:
+            merged_df = pd.concat(frames)
+            merged_dict[key] = merged_df.loc[~merged_df.index.duplicated(keep="last")]
     return merged_dict
 
 
@@ -141,16 +146,165 @@ def get_calling_module_location():
 def _momentum_calc_for_vbt_data(vbt_data: vbt.Data, momentum_period: int) -> dict[str: pd.DataFrame]:
     """Calculate momentum ranking for list of history dataframes"""
     logger.info("Calculating momentum ranking for pairs histories")
-    return vbt_data.close.rolling(momentum_period).apply(_legacy_momentum_calculate)
+    close = vbt_data.close
+    slope, r_squared = _rolling_log_slope_r2(close=close, window=momentum_period)
+    return close.vbt.wrapper.wrap(_momentum_score(slope, r_squared))
 
 
-def _legacy_momentum_calculate(price_closes: pd.DataFrame) -> float:
+def _rolling_log_slope_r2(close: pd.DataFrame, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Rolling OLS slope and r squared of log close, closes are logged once in place into a single buffer"""
+    log_close = close.vbt.to_2d_array().astype(np.float64)
+    np.log(log_close, out=log_close)
+    slope = np.empty_like(log_close)
+    r_squared = np.empty_like(log_close)
+    _rolling_slope_r2_nb(log_close, window, slope, r_squared)
+    return slope, r_squared
+
+
+def _legacy_momentum_calculate(price_closes: np.ndarray) -> float:
     """Calculating momentum from close"""
-    returns = np.log(price_closes)
-    x = np.arange(len(returns))
-    slope, _, rvalue, _, _ = linregress(x, returns)
-    slope = slope * 100
-    return (((np.exp(slope) ** 252) - 1) * 100) * (rvalue ** 2)
+    slope, r_squared = _slope_r2_nb(np.log(price_closes))
+    return _momentum_score(slope, r_squared)
+
+
+def _momentum_score(slope: tp.Union[float, np.ndarray], r_squared: tp.Union[float, np.ndarray]
+                    ) -> tp.Union[float, np.ndarray]:
+    """Annualized log slope weighted by r squared, works on scalars and arrays alike"""
+    return (((np.exp(slope * 100) ** 252) - 1) * 100) * r_squared
+
+
+@njit(cache=True, fastmath=True)
+def _slope_r2_nb(y: np.ndarray) -> tuple[float, float]:
+    """Closed form OLS slope and r squared of y against its index, single pass instead of linregress"""
+    n = y.shape[0]
+    sum_x = (n - 1) * n / 2
+    sum_xx = (n - 1) * n * (2 * n - 1) / 6
+    sum_y = 0.0
+    sum_xy = 0.0
+    sum_yy = 0.0
+    for i in range(n):
+        sum_y += y[i]
+        sum_xy += i * y[i]
+        sum_yy += y[i] * y[i]
+    cov_xy = n * sum_xy - sum_x * sum_y
+    var_x = n * sum_xx - sum_x * sum_x
+    var_y = n * sum_yy - sum_y * sum_y
+    slope = cov_xy / var_x
+    r_squared = cov_xy * cov_xy / (var_x * var_y)
+    return slope, r_squared
+
+
+@njit(cache=True, parallel=True)
+def _rolling_slope_r2_nb(log_close: np.ndarray, window: int, slope_out: np.ndarray, r2_out: np.ndarray) -> None:
+    """Rolling OLS slope and r squared of every column against its index, running sums make each step O(1),
+    windows containing NaN are left as NaN the same way as pandas rolling, columns run in parallel"""
+    n_rows, n_cols = log_close.shape
+    sum_x = (window - 1) * window / 2
+    sum_xx = (window - 1) * window * (2 * window - 1) / 6
+    var_x = window * sum_xx - sum_x * sum_x
+    for col in prange(n_cols):
+        base = np.nan
+        valid = 0
+        sum_y = 0.0
+        sum_xy = 0.0
+        sum_yy = 0.0
+        for i in range(n_rows):
+            slope_out[i, col] = np.nan
+            r2_out[i, col] = np.nan
+            if np.isnan(log_close[i, col]):
+                valid = 0
+                continue
+            if valid == 0:
+                # Shift by the first value of the segment to keep the running sums small
+                base = log_close[i, col]
+                sum_y = 0.0
+                sum_xy = 0.0
+                sum_yy = 0.0
+            y = log_close[i, col] - base
+            if valid < window:
+                sum_xy += valid * y
+                valid += 1
+            else:
+                y_old = log_close[i - window, col] - base
+                sum_xy += (window - 1) * y - (sum_y - y_old)
+                sum_y -= y_old
+                sum_yy -= y_old * y_old
+            sum_y += y
+            sum_yy += y * y
+            if valid == window:
+                cov_xy = window * sum_xy - sum_x * sum_y
+                var_y = window * sum_yy - sum_y * sum_y
+                slope_out[i, col] = cov_xy / var_x
+                r2_out[i, col] = cov_xy * cov_xy / (var_x * var_y)
+
+
+@njit(cache=True)
+def _rolling_beta_nb(x: np.ndarray, y: np.ndarray, window: int, out: np.ndarray) -> None:
+    """Rolling OLS slope of y on x kept with running sums, windows containing NaN are left as NaN"""
+    valid = 0
+    base_x = 0.0
+    base_y = 0.0
+    sum_x = 0.0
+    sum_y = 0.0
+    sum_xx = 0.0
+    sum_xy = 0.0
+    for i in range(x.shape[0]):
+        out[i] = np.nan
+        if np.isnan(x[i]) or np.isnan(y[i]):
+            valid = 0
+            continue
+        if valid == 0:
+            # Shift by the first values of the segment to keep the running sums small
+            base_x = x[i]
+            base_y = y[i]
+            sum_x = 0.0
+            sum_y = 0.0
+            sum_xx = 0.0
+            sum_xy = 0.0
+        if valid < window:
+            valid += 1
+        else:
+            old_x = x[i - window] - base_x
+            old_y = y[i - window] - base_y
+            sum_x -= old_x
+            sum_y -= old_y
+            sum_xx -= old_x * old_x
+            sum_xy -= old_x * old_y
+        new_x = x[i] - base_x
+        new_y = y[i] - base_y
+        sum_x += new_x
+        sum_y += new_y
+        sum_xx += new_x * new_x
+        sum_xy += new_x * new_y
+        if valid == window:
+            out[i] = (window * sum_xy - sum_x * sum_y) / (window * sum_xx - sum_x * sum_x)
+
+
+@njit(cache=True, parallel=True)
+def _natr_nb(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int, out: np.ndarray) -> None:
+    """Wilder NATR of every column computed the same way as TA-Lib, leading NaN of not yet listed pairs are skipped"""
+    n_rows, n_cols = close.shape
+    for col in prange(n_cols):
+        out[:, col] = np.nan
+        start = 0
+        while start < n_rows and np.isnan(high[start, col] + low[start, col] + close[start, col]):
+            start += 1
+        if start + period >= n_rows:
+            continue
+        atr = 0.0
+        for i in range(start + 1, n_rows):
+            prev_close = close[i - 1, col]
+            true_range = max(high[i, col] - low[i, col], abs(high[i, col] - prev_close),
+                             abs(low[i, col] - prev_close))
+            if np.isnan(high[i, col] + low[i, col] + prev_close):
+                true_range = np.nan
+            if i <= start + period:
+                atr += true_range / period
+                if i < start + period:
+                    continue
+            else:
+                atr = (atr * (period - 1) + true_range) / period
+            out[i, col] = atr / close[i, col] * 100
 
 
 def excel_save_formatted_naive(dataframe: pd.DataFrame,